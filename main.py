@@ -1,21 +1,29 @@
-import json
+import asyncio
+import gzip
+import hashlib
 import logging
+import re
 import time
 import uuid
-from threading import Lock
-from typing import Callable, Dict, List, Optional, Tuple
+from array import array
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage
 from langchain_postgres import PGVector
 from pydantic import BaseModel
-import psycopg
-import redis
+from starlette.routing import Mount
+import orjson
+from psycopg_pool import AsyncConnectionPool
+import redis.asyncio as aioredis
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
@@ -28,17 +36,35 @@ from settings import get_settings
 
 settings = get_settings()
 
+# Settings read on every request, resolved once instead of going through
+# pydantic attribute access in the middleware hot path.
+_RL_ENABLED = settings.enable_rate_limit
+_RL_LIMIT = settings.rate_limit_per_minute
+_RL_PATHS = ("/v1/",)
+_METRICS_ENABLED = settings.enable_metrics
+# Probe and scrape endpoints skip request logging, metrics and tracing.
+_UNTRACKED_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
 logging.basicConfig(
     level=logging.INFO,
     format='{"level":"%(levelname)s","message":%(message)s}',
 )
 logger = logging.getLogger("app")
 
+
+@asynccontextmanager
+async def lifespan(app_instance: FastAPI) -> AsyncIterator[None]:
+    await init_backends()
+    yield
+    await close_backends()
+
+
 app = FastAPI(
     title="LangChain Hello World",
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 origins = (
@@ -57,6 +83,8 @@ app.add_middleware(
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount does not set scope["route"], so mounted apps are labelled by prefix.
+_MOUNT_PATHS = tuple(route.path for route in app.routes if isinstance(route, Mount))
 
 REQUEST_COUNT = Counter(
     "http_requests_total",
@@ -69,11 +97,31 @@ REQUEST_LATENCY = Histogram(
     ["method", "path"],
 )
 
-_rate_lock = Lock()
-_rate_state: Dict[str, Tuple[float, int]] = {}
-_vector_lock = Lock()
+# Rate limit state is an LRU of (window_start, count) capped at
+# _RATE_MAX_KEYS; every _RATE_SWEEP_EVERY hits the _RATE_SWEEP_SIZE least
+# recently seen keys are checked and dropped once their window has expired.
+# It is only touched from the event loop and check_rate_limit never
+# awaits, so no lock is needed.
+_RATE_MAX_KEYS = 100_000
+_RATE_SWEEP_EVERY = 64
+_RATE_SWEEP_SIZE = 32
+_rate_state: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+_rate_hits = 0
+_pg_ext_ready = False
 _vector_store: Optional[PGVector] = None
-_redis_client: Optional[redis.Redis] = None
+_semantic_cache_store: Optional[PGVector] = None
+# Expired semantic cache rows are deleted at most this often, on write.
+_SEMANTIC_PURGE_SECONDS = 60.0
+_semantic_purged_at = float("-inf")
+# Exact repeats usually hit Redis first, so this only needs to absorb
+# short bursts; vectors are kept as float32 arrays (~6 KB each).
+_EMBED_CACHE_SIZE = 128
+_embed_cache: OrderedDict[str, array] = OrderedDict()
+_redis_client: Optional[aioredis.Redis] = None
+# Rendered /metrics output is reused for scrapes within this many seconds.
+_METRICS_CACHE_SECONDS = 1.0
+_METRICS_GZIP_LEVEL = 5
+_metrics_cache: Tuple[float, bytes, Optional[bytes]] = (float("-inf"), b"", None)
 
 
 def setup_tracing(app_instance: FastAPI) -> None:
@@ -82,13 +130,28 @@ def setup_tracing(app_instance: FastAPI) -> None:
     if not settings.otel_exporter_otlp_endpoint:
         return
 
-    resource = Resource(attributes={"service.name": settings.otel_service_name})
-    provider = TracerProvider(resource=resource)
-    exporter = OTLPSpanExporter(endpoint=settings.otel_exporter_otlp_endpoint)
-    processor = BatchSpanProcessor(exporter)
-    provider.add_span_processor(processor)
-    trace.set_tracer_provider(provider)
-    FastAPIInstrumentor.instrument_app(app_instance)
+    # The global provider can only be set once per process; creating another
+    # would leak an exporter thread behind a provider that is ignored.
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        resource = Resource(attributes={"service.name": settings.otel_service_name})
+        provider = TracerProvider(resource=resource)
+        exporter = OTLPSpanExporter(endpoint=settings.otel_exporter_otlp_endpoint)
+        processor = BatchSpanProcessor(
+            exporter,
+            max_queue_size=settings.otel_max_queue_size,
+            schedule_delay_millis=settings.otel_schedule_delay_millis,
+            max_export_batch_size=settings.otel_max_export_batch_size,
+            export_timeout_millis=settings.otel_export_timeout_millis,
+        )
+        provider.add_span_processor(processor)
+        trace.set_tracer_provider(provider)
+    # OTel matches these with re.search against the full URL, so anchor them
+    # to exact paths like the middleware's set.
+    excluded_urls = ",".join(
+        rf"^https?://[^/]+{re.escape(path)}(\?.*)?$"
+        for path in sorted(_UNTRACKED_PATHS)
+    )
+    FastAPIInstrumentor.instrument_app(app_instance, excluded_urls=excluded_urls)
 
 
 setup_tracing(app)
@@ -110,45 +173,201 @@ def _psycopg_url() -> str:
     return settings.database_url
 
 
-def ensure_pgvector() -> None:
-    with psycopg.connect(_psycopg_url()) as conn:
-        conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-        conn.commit()
+# Only used for occasional maintenance SQL, so it keeps no idle connections
+# and fails fast when Postgres is not up yet.
+_PG_CONNECT_TIMEOUT = 5.0
+_pg_pool = AsyncConnectionPool(
+    _psycopg_url(),
+    min_size=0,
+    max_size=2,
+    kwargs={"autocommit": True},
+    open=False,
+)
+
 
+async def ensure_pgvector() -> None:
+    global _pg_ext_ready
+    if _pg_ext_ready:
+        return
+    async with _pg_pool.connection(timeout=_PG_CONNECT_TIMEOUT) as conn:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    _pg_ext_ready = True
 
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(
+        model=settings.embedding_model,
+        chunk_size=settings.embedding_batch_size,
+    )
+
+
+def _build_vector_store(collection_name: str) -> PGVector:
+    return PGVector(
+        embeddings=get_embeddings(),
+        collection_name=collection_name,
+        connection=settings.database_url,
+        use_jsonb=True,
+        async_mode=True,
+        create_extension=not _pg_ext_ready,
+        engine_args={"pool_size": settings.pg_pool_size},
+    )
+
+
+# Both stores are created and initialized on startup. Async PGVector defers
+# its extension, table and collection setup to the first awaited call and
+# that setup is not safe to run concurrently. If startup could not finish
+# it, the store is dropped and lazily rebuilt here on next use.
 def get_vector_store() -> PGVector:
     global _vector_store
     if _vector_store is not None:
         return _vector_store
-    with _vector_lock:
-        if _vector_store is not None:
-            return _vector_store
-        ensure_pgvector()
-        embeddings = OpenAIEmbeddings(model=settings.embedding_model)
-        _vector_store = PGVector(
-            embeddings=embeddings,
-            collection_name=settings.rag_collection,
-            connection=settings.database_url,
-            use_jsonb=True,
+    _vector_store = _build_vector_store(settings.rag_collection)
+    return _vector_store
+
+
+def get_semantic_cache_store() -> PGVector:
+    global _semantic_cache_store
+    if _semantic_cache_store is not None:
+        return _semantic_cache_store
+    _semantic_cache_store = _build_vector_store(settings.semantic_cache_collection)
+    return _semantic_cache_store
+
+
+async def embed_query(text: str) -> List[float]:
+    cached = _embed_cache.get(text)
+    if cached is not None:
+        _embed_cache.move_to_end(text)
+        return cached.tolist()
+    embedding = await get_embeddings().aembed_query(text)
+    _embed_cache[text] = array("f", embedding)
+    if len(_embed_cache) > _EMBED_CACHE_SIZE:
+        _embed_cache.popitem(last=False)
+    return embedding
+
+
+def _semantic_prompt_hash(k: int) -> str:
+    return hashlib.sha256(f"{settings.rag_collection}:{k}".encode("utf-8")).hexdigest()
+
+
+async def semantic_cache_get(embedding: List[float], k: int) -> Optional[List[dict]]:
+    store = get_semantic_cache_store()
+    hits = await store.asimilarity_search_with_score_by_vector(
+        embedding,
+        k=1,
+        filter={
+            "prompt_hash": {"$eq": _semantic_prompt_hash(k)},
+            "expires_at": {"$gt": time.time()},
+        },
+    )
+    if not hits:
+        return None
+    doc, distance = hits[0]
+    # PGVector scores with cosine distance, so similarity is 1 - distance.
+    if 1 - distance < settings.semantic_cache_threshold:
+        return None
+    return orjson.loads(doc.page_content)
+
+
+async def semantic_cache_set(embedding: List[float], k: int, results: List[dict]) -> None:
+    store = get_semantic_cache_store()
+    await store.aadd_embeddings(
+        texts=[orjson.dumps(results).decode()],
+        embeddings=[embedding],
+        metadatas=[
+            {
+                "prompt_hash": _semantic_prompt_hash(k),
+                "expires_at": time.time() + settings.cache_ttl_seconds,
+            }
+        ],
+    )
+    await purge_semantic_cache()
+
+
+# Uses langchain_postgres' default table names.
+_SEMANTIC_PURGE_SQL = """
+DELETE FROM langchain_pg_embedding e
+USING langchain_pg_collection c
+WHERE e.collection_id = c.uuid
+  AND c.name = %s
+  AND (e.cmetadata->>'expires_at')::float < %s
+"""
+
+
+async def purge_semantic_cache() -> None:
+    global _semantic_purged_at
+    now = time.monotonic()
+    if now - _semantic_purged_at < _SEMANTIC_PURGE_SECONDS:
+        return
+    _semantic_purged_at = now
+    try:
+        async with _pg_pool.connection(timeout=_PG_CONNECT_TIMEOUT) as conn:
+            await conn.execute(
+                _SEMANTIC_PURGE_SQL, (settings.semantic_cache_collection, time.time())
+            )
+    except Exception as exc:
+        logger.warning(
+            orjson.dumps({"event": "semantic_cache_purge_failed", "error": str(exc)}).decode()
         )
-        return _vector_store
 
 
-def get_redis() -> Optional[redis.Redis]:
+async def get_redis() -> Optional[aioredis.Redis]:
     global _redis_client
     if _redis_client is not None:
         return _redis_client
+    pool = None
     try:
-        _redis_client = redis.Redis.from_url(
+        pool = aioredis.ConnectionPool.from_url(
             settings.redis_url,
+            max_connections=settings.redis_pool_size,
             decode_responses=True,
+            health_check_interval=settings.redis_health_check_interval,
+            socket_connect_timeout=settings.redis_connect_timeout,
         )
-        _redis_client.ping()
+        client = aioredis.Redis(connection_pool=pool)
+        await client.ping()
+        _redis_client = client
         return _redis_client
     except Exception:
+        if pool is not None:
+            await pool.disconnect()
         return None
 
 
+async def _init_store(get_store: Callable[[], PGVector]) -> bool:
+    try:
+        # acreate_collection() runs PGVector's lazy async setup first. A failed
+        # setup stays marked as done, so the caller must drop the store.
+        await get_store().acreate_collection()
+        return True
+    except Exception as exc:
+        logger.warning(
+            orjson.dumps({"event": "vector_store_init_failed", "error": str(exc)}).decode()
+        )
+        return False
+
+
+async def init_backends() -> None:
+    try:
+        await _pg_pool.open()
+        await ensure_pgvector()
+    except Exception as exc:
+        logger.warning(
+            orjson.dumps({"event": "pgvector_init_failed", "error": str(exc)}).decode()
+        )
+    global _vector_store, _semantic_cache_store
+    if not await _init_store(get_vector_store):
+        _vector_store = None
+    if settings.enable_semantic_cache:
+        if not await _init_store(get_semantic_cache_store):
+            _semantic_cache_store = None
+    await get_redis()
+
+
+async def close_backends() -> None:
+    await _pg_pool.close()
+
+
 def get_client_ip(request: Request) -> str:
     forwarded_for = request.headers.get("x-forwarded-for")
     if forwarded_for:
@@ -159,145 +378,280 @@ def get_client_ip(request: Request) -> str:
 
 
 def should_rate_limit(path: str) -> bool:
-    return path.startswith("/v1/")
+    return path.startswith(_RL_PATHS)
+
+
+def _sweep_rate_state(now: float) -> None:
+    stale = [
+        key
+        for key, (window_start, _) in islice(_rate_state.items(), _RATE_SWEEP_SIZE)
+        if now - window_start >= 60
+    ]
+    for key in stale:
+        del _rate_state[key]
+
+
+def check_rate_limit(key: str, now: float) -> bool:
+    global _rate_hits
+    _rate_hits += 1
+    if _rate_hits % _RATE_SWEEP_EVERY == 0:
+        _sweep_rate_state(now)
+
+    window_start, count = _rate_state.get(key, (now, 0))
+
+    if now - window_start >= 60:
+        window_start, count = now, 0
+
+    if count >= _RL_LIMIT:
+        if key in _rate_state:
+            _rate_state.move_to_end(key)
+        return False
+
+    _rate_state[key] = (window_start, count + 1)
+    _rate_state.move_to_end(key)
+    if len(_rate_state) > _RATE_MAX_KEYS:
+        _rate_state.popitem(last=False)
+
+    return True
 
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next: Callable):
-    if not settings.enable_rate_limit or not should_rate_limit(request.url.path):
+    if not _RL_ENABLED or not should_rate_limit(request.url.path):
         return await call_next(request)
 
-    key = get_client_ip(request)
-    now = time.time()
+    if not check_rate_limit(get_client_ip(request), time.monotonic()):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "rate limit exceeded"},
+        )
 
-    with _rate_lock:
-        window_start, count = _rate_state.get(key, (now, 0))
+    return await call_next(request)
 
-        if now - window_start >= 60:
-            window_start, count = now, 0
 
-        if count >= settings.rate_limit_per_minute:
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "rate limit exceeded"},
-            )
+@lru_cache(maxsize=1024)
+def _request_count(method: str, path: str, status: int):
+    return REQUEST_COUNT.labels(method, path, status)
 
-        _rate_state[key] = (window_start, count + 1)
 
-    return await call_next(request)
+@lru_cache(maxsize=1024)
+def _request_latency(method: str, path: str):
+    return REQUEST_LATENCY.labels(method, path)
+
+
+def route_label(request: Request) -> str:
+    # Label metrics by route template so path parameters, 404 probes and
+    # requests rejected before routing (e.g. 429s) cannot blow up series
+    # cardinality.
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    path = request.url.path
+    for prefix in _MOUNT_PATHS:
+        if path.startswith(prefix + "/"):
+            return prefix
+    return "unmatched"
 
 
 @app.middleware("http")
 async def request_id_middleware(request: Request, call_next: Callable):
+    if request.url.path in _UNTRACKED_PATHS:
+        return await call_next(request)
+
     request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
-    start = time.time()
+    start_ns = time.perf_counter_ns()
     response = await call_next(request)
-    duration_ms = int((time.time() - start) * 1000)
+    elapsed_ns = time.perf_counter_ns() - start_ns
     response.headers["x-request-id"] = request_id
 
-    if settings.enable_metrics:
-        path = request.url.path
-        REQUEST_COUNT.labels(request.method, path, response.status_code).inc()
-        REQUEST_LATENCY.labels(request.method, path).observe(
-            (time.time() - start)
+    path = request.url.path
+    if _METRICS_ENABLED:
+        label = route_label(request)
+        _request_count(request.method, label, response.status_code).inc()
+        _request_latency(request.method, label).observe(elapsed_ns / 1e9)
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            orjson.dumps(
+                {
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": path,
+                    "status": response.status_code,
+                    "duration_ms": elapsed_ns // 1_000_000,
+                }
+            ).decode()
         )
-
-    logger.info(
-        json.dumps(
-            {
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status": response.status_code,
-                "duration_ms": duration_ms,
-            }
-        )
-    )
     return response
 
 
-def get_llm_response() -> str:
-    llm = ChatOpenAI(
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    return ChatOpenAI(
         model=settings.model,
         temperature=settings.temperature,
         request_timeout=settings.request_timeout,
         max_retries=settings.max_retries,
     )
-    response = llm.invoke(
+
+
+async def get_llm_response() -> str:
+    response = await get_llm().ainvoke(
         [HumanMessage(content="Responda com 'Hello, world!' em portugues e em ingles.")]
     )
     return response.content
 
 
+with open("static/index.html", "r", encoding="utf-8") as f:
+    _INDEX_HTML = f.read()
+_INDEX_ETAG = '"' + hashlib.sha256(_INDEX_HTML.encode("utf-8")).hexdigest()[:32] + '"'
+_INDEX_HEADERS = {"ETag": _INDEX_ETAG, "Cache-Control": "no-cache"}
+
+
 @app.get("/", response_class=HTMLResponse)
-def index() -> HTMLResponse:
-    with open("static/index.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+def index(request: Request) -> Response:
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    return HTMLResponse(content=_INDEX_HTML, headers=_INDEX_HEADERS)
 
 
 @app.post("/v1/ingest")
-def ingest(req: IngestRequest) -> dict:
+async def ingest(req: IngestRequest) -> dict:
     if not req.texts:
         raise HTTPException(status_code=400, detail="texts is required")
     metadatas = req.metadatas or [{} for _ in req.texts]
     if len(metadatas) != len(req.texts):
         raise HTTPException(status_code=400, detail="metadatas length mismatch")
 
-    docs = [
-        Document(page_content=text, metadata=meta or {})
-        for text, meta in zip(req.texts, metadatas)
-    ]
     store = get_vector_store()
-    ids = store.add_documents(docs)
-    return {"ingested": len(ids)}
+    size = settings.ingest_batch_size
+    batches = [
+        (req.texts[i : i + size], [meta or {} for meta in metadatas[i : i + size]])
+        for i in range(0, len(req.texts), size)
+    ]
+    semaphore = asyncio.Semaphore(settings.ingest_concurrency)
+
+    async def add_batch(texts: List[str], metas: List[Dict]) -> List[str]:
+        async with semaphore:
+            return await store.aadd_texts(texts, metadatas=metas)
+
+    # The first batch runs alone so a store that skipped the startup hook
+    # finishes its collection setup before the other batches write to it.
+    outcomes = await asyncio.gather(add_batch(*batches[0]), return_exceptions=True)
+    if not isinstance(outcomes[0], BaseException):
+        outcomes += await asyncio.gather(
+            *(add_batch(*batch) for batch in batches[1:]),
+            return_exceptions=True,
+        )
+
+    # Batches commit independently; on failure report which ones were not
+    # stored so the caller can resubmit only those texts.
+    failed = [
+        i
+        for i in range(len(batches))
+        if i >= len(outcomes) or isinstance(outcomes[i], BaseException)
+    ]
+    ingested = sum(
+        len(ids) for ids in outcomes if not isinstance(ids, BaseException)
+    )
+    if failed:
+        error = next(exc for exc in outcomes if isinstance(exc, BaseException))
+        logger.warning(
+            orjson.dumps(
+                {"event": "ingest_failed", "ingested": ingested, "error": str(error)}
+            ).decode()
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "ingest failed",
+                "ingested": ingested,
+                "batch_size": size,
+                "failed_batches": failed,
+            },
+        )
+    return {"ingested": ingested}
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def query_cache_key(normalized: str, k: int) -> str:
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"rag:q:{digest}:{k}"
 
 
 @app.post("/v1/query")
-def query(req: QueryRequest) -> dict:
-    cache_key = f"rag:query:{req.query}:{req.k}"
-    r = get_redis()
+async def query(req: QueryRequest) -> dict:
+    normalized = normalize_query(req.query)
+    cache_key = query_cache_key(normalized, req.k)
+    r = await get_redis()
     if r:
-        cached = r.get(cache_key)
+        cached = await r.get(cache_key)
         if cached:
-            return json.loads(cached)
+            entry = orjson.loads(cached)
+            if entry.get("normalized_query") == normalized:
+                return {"query": req.query, "results": entry["results"]}
 
     store = get_vector_store()
-    results = store.similarity_search_with_score(req.query, k=req.k)
+    embedding = await embed_query(req.query)
+    if settings.enable_semantic_cache:
+        cached_results = await semantic_cache_get(embedding, req.k)
+        if cached_results is not None:
+            return {"query": req.query, "results": cached_results}
+
+    results = await store.asimilarity_search_with_score_by_vector(embedding, k=req.k)
     payload = [
         {"text": doc.page_content, "metadata": doc.metadata, "score": score}
         for doc, score in results
     ]
     response = {"query": req.query, "results": payload}
     if r:
-        r.setex(cache_key, settings.cache_ttl_seconds, json.dumps(response))
+        entry = {"normalized_query": normalized, "results": payload}
+        await r.setex(cache_key, settings.cache_ttl_seconds, orjson.dumps(entry))
+    if settings.enable_semantic_cache:
+        await semantic_cache_set(embedding, req.k, payload)
     return response
 
 
 @app.get("/v1/hello")
-def hello_v1() -> dict:
-    return {"message": get_llm_response(), "version": "v1"}
+async def hello_v1() -> dict:
+    return {"message": await get_llm_response(), "version": "v1"}
 
 
 @app.get("/api/hello")
-def hello_legacy() -> dict:
-    return {"message": get_llm_response(), "deprecated": True}
+async def hello_legacy() -> dict:
+    return {"message": await get_llm_response(), "deprecated": True}
 
 
 @app.get("/metrics")
-def metrics() -> Response:
-    if not settings.enable_metrics:
+def metrics(request: Request) -> Response:
+    global _metrics_cache
+    if not _METRICS_ENABLED:
         return Response(status_code=404)
-    data = generate_latest()
-    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
+    rendered_at, data, gzipped = _metrics_cache
+    now = time.monotonic()
+    if now - rendered_at >= _METRICS_CACHE_SECONDS:
+        rendered_at, data, gzipped = now, generate_latest(), None
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        if gzipped is None:
+            gzipped = gzip.compress(data, compresslevel=_METRICS_GZIP_LEVEL)
+        _metrics_cache = (rendered_at, data, gzipped)
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gzipped, media_type=CONTENT_TYPE_LATEST, headers=headers)
+    _metrics_cache = (rendered_at, data, gzipped)
+    return Response(content=data, media_type=CONTENT_TYPE_LATEST, headers=headers)
 
 
 @app.get("/api/dashboard")
-def dashboard() -> dict:
-    r = get_redis()
+async def dashboard() -> dict:
+    r = await get_redis()
     cache_ok = False
     if r:
         try:
-            r.ping()
+            await r.ping()
             cache_ok = True
         except Exception:
             cache_ok = False
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,9 +14,21 @@ class Settings(BaseSettings):
     app_host: str = "0.0.0.0"
     app_port: int = 8000
     database_url: str = "postgresql+psycopg://postgres:postgres@db:5432/app"
+    pg_pool_size: int = 10
     rag_collection: str = "documents"
+    embedding_batch_size: int = 512
+    ingest_batch_size: int = 512
+    ingest_concurrency: int = 4
     redis_url: str = "redis://redis:6379/0"
     cache_ttl_seconds: int = 300
+    redis_pool_size: int = 50
+    redis_health_check_interval: int = 30
+    redis_connect_timeout: float = 2.0
+
+    # Semantic cache
+    enable_semantic_cache: bool = False
+    semantic_cache_collection: str = "rag_semantic_cache"
+    semantic_cache_threshold: float = 0.95
 
     # Rate limiting
     enable_rate_limit: bool = True
@@ -25,9 +39,14 @@ class Settings(BaseSettings):
     enable_tracing: bool = False
     otel_service_name: str = "projeto_codex"
     otel_exporter_otlp_endpoint: str = ""
+    otel_max_queue_size: int = 4096
+    otel_schedule_delay_millis: int = 1000
+    otel_max_export_batch_size: int = 256
+    otel_export_timeout_millis: int = 10000
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     return Settings()
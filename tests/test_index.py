@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+def test_index_sets_etag():
+    resp = client.get("/")
+    assert resp.status_code == 200
+    assert resp.headers["etag"]
+    assert "text/html" in resp.headers["content-type"]
+
+
+def test_index_not_modified():
+    etag = client.get("/").headers["etag"]
+    resp = client.get("/", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
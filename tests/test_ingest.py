@@ -0,0 +1,73 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+
+client = TestClient(app)
+
+
+class FakeStore:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def aadd_texts(self, texts, metadatas=None):
+        self.calls.append(list(texts))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0)
+            if texts[0] in self.fail_on:
+                raise RuntimeError("insert failed")
+            return [f"id-{text}" for text in texts]
+        finally:
+            self.active -= 1
+
+
+def _use_store(monkeypatch, store, concurrency=4):
+    monkeypatch.setattr(main, "get_vector_store", lambda: store)
+    monkeypatch.setattr(main.settings, "ingest_batch_size", 2)
+    monkeypatch.setattr(main.settings, "ingest_concurrency", concurrency)
+
+
+def test_ingest_batches_texts(monkeypatch):
+    store = FakeStore()
+    _use_store(monkeypatch, store, concurrency=1)
+
+    resp = client.post("/v1/ingest", json={"texts": ["a", "b", "c", "d", "e"]})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"ingested": 5}
+    assert store.calls == [["a", "b"], ["c", "d"], ["e"]]
+    assert store.max_active == 1
+
+
+def test_ingest_reports_failed_batches(monkeypatch):
+    store = FakeStore(fail_on={"c"})
+    _use_store(monkeypatch, store)
+
+    resp = client.post("/v1/ingest", json={"texts": ["a", "b", "c", "d", "e"]})
+
+    assert resp.status_code == 500
+    assert resp.json()["detail"] == {
+        "error": "ingest failed",
+        "ingested": 3,
+        "batch_size": 2,
+        "failed_batches": [1],
+    }
+
+
+def test_ingest_skips_remaining_batches_when_first_fails(monkeypatch):
+    store = FakeStore(fail_on={"a"})
+    _use_store(monkeypatch, store)
+
+    resp = client.post("/v1/ingest", json={"texts": ["a", "b", "c", "d", "e"]})
+
+    assert resp.status_code == 500
+    assert resp.json()["detail"]["ingested"] == 0
+    assert resp.json()["detail"]["failed_batches"] == [0, 1, 2]
+    assert store.calls == [["a", "b"]]
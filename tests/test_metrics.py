@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from main import app, route_label
+
+client = TestClient(app)
+
+
+def test_metrics_gzip():
+    resp = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "http_requests_total" in resp.text
+
+
+def test_metrics_identity():
+    resp = client.get("/metrics", headers={"Accept-Encoding": "identity"})
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    assert "http_requests_total" in resp.text
+
+
+def _request(path, route=None):
+    scope = {"route": route} if route is not None else {}
+    return SimpleNamespace(scope=scope, url=SimpleNamespace(path=path))
+
+
+def test_route_label_uses_mount_prefix():
+    assert route_label(_request("/static/index.html")) == "/static"
+
+
+def test_route_label_unmatched():
+    assert route_label(_request("/v1/random-1")) == "unmatched"
+    assert route_label(_request("/staticfoo")) == "unmatched"
+
+
+def test_route_label_route_template():
+    route = SimpleNamespace(path="/v1/query")
+    assert route_label(_request("/v1/query", route)) == "/v1/query"
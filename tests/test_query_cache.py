@@ -0,0 +1,12 @@
+from main import normalize_query, query_cache_key
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  What  is\tRAG?\n") == "what is rag?"
+
+
+def test_query_cache_key_is_fixed_size():
+    short = query_cache_key(normalize_query("rag"), 4)
+    long = query_cache_key(normalize_query("rag " * 1000), 4)
+    assert short.startswith("rag:q:") and short.endswith(":4")
+    assert len(short) == len(long)
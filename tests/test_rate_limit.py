@@ -0,0 +1,24 @@
+import main
+from main import check_rate_limit, settings
+
+
+def test_rate_limit_blocks_after_limit():
+    key = "test-blocks-after-limit"
+    now = 1000.0
+    for _ in range(settings.rate_limit_per_minute):
+        assert check_rate_limit(key, now)
+    assert not check_rate_limit(key, now)
+
+
+def test_rate_limit_resets_after_window():
+    key = "test-resets-after-window"
+    now = 1000.0
+    for _ in range(settings.rate_limit_per_minute):
+        check_rate_limit(key, now)
+    assert not check_rate_limit(key, now + 30)
+    assert check_rate_limit(key, now + 60)
+
+
+def test_rate_limit_zero_limit_blocks_unseen_key(monkeypatch):
+    monkeypatch.setattr(main, "_RL_LIMIT", 0)
+    assert not check_rate_limit("test-zero-limit", 1000.0)
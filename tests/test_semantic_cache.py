@@ -0,0 +1,59 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import orjson
+
+import main
+
+RESULTS = [{"text": "cached", "metadata": {}, "score": 0.1}]
+
+
+class FakeStore:
+    def __init__(self, distance):
+        self.distance = distance
+        self.filters = []
+
+    async def asimilarity_search_with_score_by_vector(self, embedding, k, filter):
+        self.filters.append(filter)
+        doc = SimpleNamespace(page_content=orjson.dumps(RESULTS).decode())
+        return [(doc, self.distance)]
+
+
+def _lookup(monkeypatch, distance, k=4):
+    store = FakeStore(distance)
+    monkeypatch.setattr(main, "get_semantic_cache_store", lambda: store)
+    monkeypatch.setattr(main.settings, "semantic_cache_threshold", 0.95)
+    return asyncio.run(main.semantic_cache_get([0.1, 0.2], k)), store
+
+
+def test_semantic_cache_hit_above_threshold(monkeypatch):
+    results, _ = _lookup(monkeypatch, distance=0.03)
+    assert results == RESULTS
+
+
+def test_semantic_cache_miss_below_threshold(monkeypatch):
+    results, _ = _lookup(monkeypatch, distance=0.1)
+    assert results is None
+
+
+def test_semantic_cache_filters_by_prompt_and_expiry(monkeypatch):
+    before = time.time()
+    _, store = _lookup(monkeypatch, distance=0.0, k=3)
+    (filter_,) = store.filters
+    assert filter_["prompt_hash"] == {"$eq": main._semantic_prompt_hash(3)}
+    assert filter_["prompt_hash"] != {"$eq": main._semantic_prompt_hash(4)}
+    assert filter_["expires_at"]["$gt"] >= before
+
+
+def test_semantic_cache_purge_failure_is_logged(monkeypatch, caplog):
+    class BrokenPool:
+        def connection(self, timeout=None):
+            raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(main, "_pg_pool", BrokenPool())
+    monkeypatch.setattr(main, "_semantic_purged_at", float("-inf"))
+
+    asyncio.run(main.purge_semantic_cache())
+
+    assert "semantic_cache_purge_failed" in caplog.text
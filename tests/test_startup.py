@@ -0,0 +1,66 @@
+import asyncio
+
+import main
+
+
+class FakeStore:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.init_calls = 0
+
+    async def acreate_collection(self):
+        self.init_calls += 1
+        if self.fail:
+            raise RuntimeError("database unavailable")
+
+
+class FakePool:
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+async def _noop():
+    return None
+
+
+def _patch_backends(monkeypatch):
+    monkeypatch.setattr(main, "_pg_pool", FakePool())
+    monkeypatch.setattr(main, "ensure_pgvector", _noop)
+    monkeypatch.setattr(main, "get_redis", _noop)
+
+
+def test_startup_initializes_vector_store(monkeypatch):
+    _patch_backends(monkeypatch)
+    store = FakeStore()
+    monkeypatch.setattr(main, "_vector_store", store)
+
+    asyncio.run(main.init_backends())
+
+    assert store.init_calls == 1
+    assert main._vector_store is store
+
+
+def test_startup_drops_store_when_init_fails(monkeypatch):
+    _patch_backends(monkeypatch)
+    monkeypatch.setattr(main, "_vector_store", FakeStore(fail=True))
+
+    asyncio.run(main.init_backends())
+
+    assert main._vector_store is None
+
+
+def test_startup_survives_store_construction_error(monkeypatch):
+    _patch_backends(monkeypatch)
+
+    def broken_store():
+        raise RuntimeError("OPENAI_API_KEY is not set")
+
+    monkeypatch.setattr(main, "_vector_store", None)
+    monkeypatch.setattr(main, "get_vector_store", broken_store)
+
+    asyncio.run(main.init_backends())
+
+    assert main._vector_store is None